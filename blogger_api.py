@@ -1,31 +1,78 @@
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-import pickle
+import json
+from itertools import islice
 import os
-from typing import Optional, List, Dict, Callable, Any
+from typing import Optional, List, Dict, Tuple, Iterator, Callable, Any, TYPE_CHECKING
+import asyncio
+import random
+import threading
 import time
+from datetime import datetime, timedelta
+
+import config
+from utils import TokenBucket
+
+# The Google client libraries take a noticeable time to import, so they are
+# loaded inside the methods that need them rather than at application start.
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+    from google_auth_httplib2 import AuthorizedHttp
+
+# Log levels from least to most severe, used for min_level filtering
+_LOG_LEVEL_ORDER = {'DEBUG': 0, 'INFO': 1, 'SUCCESS': 2, 'WARNING': 3, 'ERROR': 4}
+
+# Blogger accepts at most this many calls in one batch request
+_MAX_BATCH_SIZE = 100
+
+# HTTP statuses worth retrying: rate limiting and transient server errors
+_RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+# Fields shared by every post request body
+_POST_TEMPLATE = {'kind': 'blogger#post'}
+
+# Partial response for post listings: only the fields get_posts returns
+_POST_LIST_FIELDS = 'items(id,title,url,published,updated,labels),nextPageToken'
+
+# Exponential backoff base delays per retry attempt, in seconds
+_BACKOFF = tuple(config.RETRY_DELAY * (2 ** i) for i in range(config.MAX_RETRIES))
 
 class BloggerAPIHandler:
-    def __init__(self, logger_callback: Optional[Callable] = None):
+    def __init__(self, logger_callback: Optional[Callable] = None,
+                 min_level: str = "DEBUG"):
         """Initialize the Blogger API handler.
         
         Args:
             logger_callback (callable, optional): Function to call for logging
+            min_level (str): Lowest log level passed on to the logger
         """
         self.SCOPES = ['https://www.googleapis.com/auth/blogger']
-        self.credentials: Optional[Credentials] = None
+        self.credentials: Optional['Credentials'] = None
         self.service = None
+        self._http: Optional['AuthorizedHttp'] = None
+        # httplib2 connections are not thread-safe, so requests on the shared
+        # one are sent one at a time
+        self._http_lock = threading.Lock()
+        self._bucket = TokenBucket(rate=config.API_QPS, capacity=config.API_BURST)
+        self._quota_lock = threading.Lock()
+        self._quota_day = config.now_local().date()
+        self._calls_today = 0
+        self._etag_cache: Dict[str, Tuple[str, Dict]] = {}
         self.blogs: List[Dict] = []
+        self._blogs_by_name: Dict[str, str] = {}
         self.logger = logger_callback or print
-        self.token_file = 'token.pickle'
+        self._min_level_idx = _LOG_LEVEL_ORDER.get(min_level, 0)
+        self.token_file = 'token.json'
 
-    def log(self, message: str, level: str = "INFO") -> None:
-        """Log a message using the provided callback."""
-        if self.logger:
-            self.logger(message, level)
+    def log(self, message: str, level: str = "INFO", *args: Any) -> None:
+        """Log a message using the provided callback.
+        
+        The message is %-formatted with args only when the level passes
+        min_level, so filtered messages cost no string formatting.
+        """
+        logger = self.logger
+        if logger and _LOG_LEVEL_ORDER.get(level, 0) >= self._min_level_idx:
+            if args:
+                message = message % args
+            logger(message, level)
 
     def authenticate(self, credentials_file: str) -> bool:
         """Authenticate with the Blogger API.
@@ -37,12 +84,20 @@ class BloggerAPIHandler:
             bool: True if authentication was successful
         """
         try:
+            from google_auth_oauthlib.flow import InstalledAppFlow
+            from google.oauth2.credentials import Credentials
+            from google.auth.transport.requests import Request
+            from googleapiclient.discovery import build
+            from google_auth_httplib2 import AuthorizedHttp
+            import httplib2
+
             self.credentials = None
             
             # Try to load existing credentials
             if os.path.exists(self.token_file):
-                with open(self.token_file, 'rb') as token:
-                    self.credentials = pickle.load(token)
+                with open(self.token_file, 'r') as token:
+                    self.credentials = Credentials.from_authorized_user_info(
+                        json.load(token), self.SCOPES)
 
             # Check if credentials are valid
             if not self.credentials or not self.credentials.valid:
@@ -56,19 +111,84 @@ class BloggerAPIHandler:
                     self.credentials = flow.run_local_server(port=0)
 
                 # Save credentials
-                with open(self.token_file, 'wb') as token:
-                    pickle.dump(self.credentials, token)
-
-            # Build the service
-            self.service = build('blogger', 'v3', credentials=self.credentials)
+                with open(self.token_file, 'w') as token:
+                    token.write(self.credentials.to_json())
+
+            # Build the service on a single authorized HTTP object so every
+            # API call reuses the same keep-alive connections. The discovery
+            # document shipped with googleapiclient is used instead of fetching
+            # it from Google on every start.
+            self.close()
+            self._etag_cache.clear()
+            self._http = AuthorizedHttp(
+                self.credentials, http=httplib2.Http(timeout=config.API_TIMEOUT))
+            self.service = build('blogger', 'v3', http=self._http,
+                                 cache_discovery=False, static_discovery=True)
             self.log("Successfully authenticated with Blogger API", level="SUCCESS")
             
             return True
 
         except Exception as e:
-            self.log(f"Authentication error: {str(e)}", level="ERROR")
+            self.log("Authentication error: %s", "ERROR", e)
             return False
 
+    def _acquire(self, calls: int = 1) -> None:
+        """Wait for the rate limiter and count the calls against today's quota."""
+        self._bucket.consume(calls)
+        today = config.now_local().date()
+        with self._quota_lock:
+            if today != self._quota_day:
+                self._quota_day = today
+                self._calls_today = 0
+            self._calls_today += calls
+
+    def _execute(self, request) -> Any:
+        """Execute an API request once the rate limiter allows it."""
+        self._acquire()
+        with self._http_lock:
+            return request.execute()
+
+    def _execute_conditional(self, cache_key: str, request) -> Dict:
+        """Execute a GET request, reusing the cached body when unchanged.
+        
+        Sends If-None-Match with the last ETag seen for cache_key; when the
+        server answers 304 Not Modified the previously cached body is returned.
+        
+        Args:
+            cache_key (str): Key identifying the requested resource
+            request: The googleapiclient request to execute
+            
+        Returns:
+            Dict: The response body
+        """
+        from googleapiclient.errors import HttpError
+
+        cached = self._etag_cache.get(cache_key)
+        if cached:
+            request.headers['If-None-Match'] = cached[0]
+
+        response_headers = {}
+        request.add_response_callback(response_headers.update)
+
+        try:
+            body = self._execute(request)
+        except HttpError as e:
+            if cached and e.resp.status == 304:
+                return cached[1]
+            raise
+
+        etag = response_headers.get('etag')
+        if etag:
+            self._etag_cache[cache_key] = (etag, body)
+        return body
+
+    def close(self) -> None:
+        """Close the pooled HTTP connections used by the API service."""
+        with self._http_lock:
+            if self._http:
+                self._http.close()
+                self._http = None
+
     def refresh_blogs(self) -> List[Dict]:
         """Refresh the list of available blogs.
         
@@ -80,7 +200,8 @@ class BloggerAPIHandler:
                 raise ValueError("Not authenticated. Please authenticate first.")
 
             # Get the blogs
-            blogs = self.service.blogs().listByUser(userId='self').execute()
+            blogs = self._execute_conditional(
+                'blogs', self.service.blogs().listByUser(userId='self'))
             
             # Store and return blog information
             self.blogs = [{
@@ -90,12 +211,14 @@ class BloggerAPIHandler:
                 'description': blog.get('description', ''),
                 'posts': blog.get('posts', {}).get('totalItems', 0)
             } for blog in blogs.get('items', [])]
+            # Reversed so the first blog wins when several share a name
+            self._blogs_by_name = {blog['name']: blog['id'] for blog in reversed(self.blogs)}
             
-            self.log(f"Found {len(self.blogs)} blogs", level="INFO")
+            self.log("Found %d blogs", "INFO", len(self.blogs))
             return self.blogs
 
         except Exception as e:
-            self.log(f"Error refreshing blogs: {str(e)}", level="ERROR")
+            self.log("Error refreshing blogs: %s", "ERROR", e)
             return []
 
     def get_selected_blog_id(self, blog_name: str) -> Optional[str]:
@@ -107,19 +230,38 @@ class BloggerAPIHandler:
         Returns:
             str: Blog ID or None if not found
         """
-        try:
-            for blog in self.blogs:
-                if blog['name'] == blog_name:
-                    return blog['id']
-            return None
-        except Exception as e:
-            self.log(f"Error getting blog ID: {str(e)}", level="ERROR")
-            return None
+        return self._blogs_by_name.get(blog_name)
 
     def post_article(self, blog_id: str, title: str, content: str, 
                     is_draft: bool = False, labels: Optional[List[str]] = None) -> bool:
         """Post an article to a blog.
         
+        Blocking wrapper around post_article_async for callers without an
+        event loop.
+        
+        Args:
+            blog_id (str): ID of the blog to post to
+            title (str): Article title
+            content (str): Article content (HTML)
+            is_draft (bool): Whether to save as draft
+            labels (List[str], optional): List of labels/tags
+            
+        Returns:
+            bool: True if posting was successful
+        """
+        return asyncio.run(self.post_article_async(
+            blog_id, title, content, is_draft=is_draft, labels=labels))
+
+    async def post_article_async(self, blog_id: str, title: str, content: str,
+                                 is_draft: bool = False,
+                                 labels: Optional[List[str]] = None) -> bool:
+        """Post an article to a blog without blocking the event loop.
+        
+        The API request runs in a worker thread and retry backoff uses
+        asyncio.sleep, so several posts can wait on retries concurrently.
+        The requests themselves are still sent one at a time, because they
+        share one HTTP connection.
+        
         Args:
             blog_id (str): ID of the blog to post to
             title (str): Article title
@@ -134,23 +276,13 @@ class BloggerAPIHandler:
             if not self.service:
                 raise ValueError("Not authenticated. Please authenticate first.")
 
-            # Prepare the post body
-            post_body = {
-                'kind': 'blogger#post',
-                'blog': {'id': blog_id},
-                'title': title,
-                'content': content,
-            }
+            from googleapiclient.errors import HttpError
 
-            # Add labels if provided
-            if labels:
-                post_body['labels'] = labels
+            # Prepare the post body
+            post_body = self._build_post_body(blog_id, title, content, labels)
 
             # Attempt to post with retries
-            max_retries = 3
-            retry_delay = 1  # seconds
-            
-            for attempt in range(max_retries):
+            for attempt in range(config.MAX_RETRIES):
                 try:
                     # Create the post
                     request = self.service.posts().insert(
@@ -159,23 +291,120 @@ class BloggerAPIHandler:
                         isDraft=is_draft
                     )
                     
-                    post = request.execute()
+                    post = await asyncio.to_thread(self._execute, request)
                     
-                    self.log(f"Successfully posted article: {title}", level="SUCCESS")
+                    self.log("Successfully posted article: %s", "SUCCESS", title)
                     return True
                     
                 except HttpError as e:
-                    if e.resp.status in [429, 500, 502, 503, 504] and attempt < max_retries - 1:
-                        wait_time = retry_delay * (2 ** attempt)  # Exponential backoff
-                        self.log(f"API error, retrying in {wait_time} seconds...", level="WARNING")
-                        time.sleep(wait_time)
+                    if e.resp.status in _RETRYABLE_STATUS and attempt < config.MAX_RETRIES - 1:
+                        # Exponential backoff with jitter
+                        wait_time = _BACKOFF[attempt] * (0.5 + random.random())
+                        self.log("API error, retrying in %.1f seconds...", "WARNING", wait_time)
+                        await asyncio.sleep(wait_time)
                         continue
                     raise
 
         except Exception as e:
-            self.log(f"Error posting article: {str(e)}", level="ERROR")
+            self.log("Error posting article: %s", "ERROR", e)
             return False
 
+    def post_articles(self, blog_id: str, articles: List[Dict],
+                      is_draft: bool = False) -> List[bool]:
+        """Post several articles using batched API requests.
+        
+        Up to _MAX_BATCH_SIZE inserts are packed into a single HTTP request.
+        Inserts that fail with a retryable status are sent again in a
+        follow-up batch with exponential backoff.
+        
+        Args:
+            blog_id (str): ID of the blog to post to
+            articles (List[Dict]): Articles with 'title', 'content' and
+                optional 'labels' keys
+            is_draft (bool): Whether to save as drafts
+            
+        Returns:
+            List[bool]: Success flag for each article, in input order
+        """
+        results = [False] * len(articles)
+        try:
+            if not self.service:
+                raise ValueError("Not authenticated. Please authenticate first.")
+
+            from googleapiclient.errors import HttpError
+
+            pending = list(range(len(articles)))
+
+            for attempt in range(config.MAX_RETRIES):
+                retry: List[int] = []
+
+                def on_post_done(request_id, response, exception):
+                    index = int(request_id)
+                    if exception is None:
+                        results[index] = True
+                    elif (isinstance(exception, HttpError)
+                          and exception.resp.status in _RETRYABLE_STATUS
+                          and attempt < config.MAX_RETRIES - 1):
+                        retry.append(index)
+                    else:
+                        self.log("Error posting article %s: %s", "ERROR",
+                                 articles[index]['title'], exception)
+
+                for start in range(0, len(pending), _MAX_BATCH_SIZE):
+                    chunk = pending[start:start + _MAX_BATCH_SIZE]
+                    batch = self.service.new_batch_http_request(callback=on_post_done)
+                    for index in chunk:
+                        article = articles[index]
+                        post_body = self._build_post_body(
+                            blog_id, article['title'], article['content'],
+                            article.get('labels'))
+                        batch.add(self.service.posts().insert(
+                            blogId=blog_id,
+                            body=post_body,
+                            isDraft=is_draft
+                        ), request_id=str(index))
+                    # Every call in the batch counts against the quota
+                    self._acquire(len(chunk))
+                    with self._http_lock:
+                        batch.execute()
+
+                if not retry:
+                    break
+
+                # Exponential backoff with jitter
+                wait_time = _BACKOFF[attempt] * (0.5 + random.random())
+                self.log("API error on %d posts, retrying in %.1f seconds...", "WARNING",
+                         len(retry), wait_time)
+                time.sleep(wait_time)
+                pending = sorted(retry)
+
+        except Exception as e:
+            self.log("Error posting articles: %s", "ERROR", e)
+
+        self.log("Successfully posted %d of %d articles",
+                 "SUCCESS" if all(results) else "WARNING", sum(results), len(articles))
+        return results
+
+    def _build_post_body(self, blog_id: str, title: str, content: str,
+                         labels: Optional[List[str]] = None,
+                         post_id: Optional[str] = None) -> Dict:
+        """Build the request body for a post insert or update."""
+        post_body = {
+            **_POST_TEMPLATE,
+            'blog': {'id': blog_id},
+            'title': title,
+            'content': content,
+        }
+
+        if post_id:
+            post_body['id'] = post_id
+
+        # Add labels if provided
+        if labels:
+            post_body['labels'] = labels
+
+        return post_body
+
     def get_blog_info(self, blog_id: str) -> Optional[Dict]:
         """Get detailed information about a blog.
         
@@ -189,7 +418,8 @@ class BloggerAPIHandler:
             if not self.service:
                 raise ValueError("Not authenticated. Please authenticate first.")
 
-            blog = self.service.blogs().get(blogId=blog_id).execute()
+            blog = self._execute_conditional(
+                f'blog:{blog_id}', self.service.blogs().get(blogId=blog_id))
             
             return {
                 'id': blog['id'],
@@ -202,7 +432,7 @@ class BloggerAPIHandler:
             }
 
         except Exception as e:
-            self.log(f"Error getting blog info: {str(e)}", level="ERROR")
+            self.log("Error getting blog info: %s", "ERROR", e)
             return None
 
     def delete_post(self, blog_id: str, post_id: str) -> bool:
@@ -219,12 +449,12 @@ class BloggerAPIHandler:
             if not self.service:
                 raise ValueError("Not authenticated. Please authenticate first.")
 
-            self.service.posts().delete(blogId=blog_id, postId=post_id).execute()
-            self.log(f"Successfully deleted post {post_id}", level="SUCCESS")
+            self._execute(self.service.posts().delete(blogId=blog_id, postId=post_id))
+            self.log("Successfully deleted post %s", "SUCCESS", post_id)
             return True
 
         except Exception as e:
-            self.log(f"Error deleting post: {str(e)}", level="ERROR")
+            self.log("Error deleting post: %s", "ERROR", e)
             return False
 
     def update_post(self, blog_id: str, post_id: str, title: str, 
@@ -246,29 +476,21 @@ class BloggerAPIHandler:
                 raise ValueError("Not authenticated. Please authenticate first.")
 
             # Prepare the update body
-            post_body = {
-                'kind': 'blogger#post',
-                'id': post_id,
-                'blog': {'id': blog_id},
-                'title': title,
-                'content': content
-            }
-
-            if labels:
-                post_body['labels'] = labels
+            post_body = self._build_post_body(blog_id, title, content, labels,
+                                              post_id=post_id)
 
             # Update the post
-            self.service.posts().update(
+            self._execute(self.service.posts().update(
                 blogId=blog_id,
                 postId=post_id,
                 body=post_body
-            ).execute()
+            ))
 
-            self.log(f"Successfully updated post: {title}", level="SUCCESS")
+            self.log("Successfully updated post: %s", "SUCCESS", title)
             return True
 
         except Exception as e:
-            self.log(f"Error updating post: {str(e)}", level="ERROR")
+            self.log("Error updating post: %s", "ERROR", e)
             return False
 
     def get_posts(self, blog_id: str, max_results: int = 10, 
@@ -284,53 +506,75 @@ class BloggerAPIHandler:
             List[Dict]: List of post information dictionaries
         """
         try:
-            if not self.service:
-                raise ValueError("Not authenticated. Please authenticate first.")
-
-            posts = self.service.posts().list(
-                blogId=blog_id,
-                maxResults=max_results,
-                status=status
-            ).execute()
-
-            return [{
-                'id': post['id'],
-                'title': post['title'],
-                'url': post.get('url', ''),
-                'published': post.get('published', ''),
-                'updated': post.get('updated', ''),
-                'labels': post.get('labels', [])
-            } for post in posts.get('items', [])]
+            return list(islice(self.iter_posts(blog_id, status=status,
+                                               page_size=max_results), max_results))
 
         except Exception as e:
-            self.log(f"Error getting posts: {str(e)}", level="ERROR")
+            self.log("Error getting posts: %s", "ERROR", e)
             return []
 
+    def iter_posts(self, blog_id: str, status: str = 'live',
+                   page_size: int = 10) -> Iterator[Dict]:
+        """Iterate over the posts of a blog, fetching one page at a time.
+        
+        Only the fields kept for each post are requested, which keeps
+        responses small.
+        
+        Args:
+            blog_id (str): ID of the blog
+            status (str): Post status ('live', 'draft', or 'scheduled')
+            page_size (int): Number of posts to request per page
+            
+        Yields:
+            Dict: Post information dictionary
+        """
+        if not self.service:
+            raise ValueError("Not authenticated. Please authenticate first.")
+
+        posts = self.service.posts()
+        request = posts.list(
+            blogId=blog_id,
+            maxResults=page_size,
+            status=status,
+            fields=_POST_LIST_FIELDS
+        )
+
+        while request is not None:
+            response = self._execute(request)
+
+            for post in response.get('items', []):
+                yield {
+                    'id': post['id'],
+                    'title': post['title'],
+                    'url': post.get('url', ''),
+                    'published': post.get('published', ''),
+                    'updated': post.get('updated', ''),
+                    'labels': post.get('labels', [])
+                }
+
+            request = posts.list_next(request, response)
+
     def check_api_quota(self) -> Dict[str, Any]:
         """Check the current API quota usage.
         
+        Blogger does not report quota usage through the API, so usage is
+        counted locally for every request this handler sends.
+        
         Returns:
             Dict: Quota information
         """
-        try:
-            if not self.service:
-                raise ValueError("Not authenticated. Please authenticate first.")
-
-            # Get quota information from the API
-            quota = self.service._http.request.credentials.get_quota()
-            
-            return {
-                'queries_used': quota.get('queries', {}).get('used', 0),
-                'queries_limit': quota.get('queries', {}).get('limit', 0),
-                'quota_reset_time': quota.get('reset_time', ''),
-                'remaining': quota.get('remaining', 0)
-            }
-
-        except Exception as e:
-            self.log(f"Error checking API quota: {str(e)}", level="ERROR")
-            return {
-                'queries_used': 0,
-                'queries_limit': 0,
-                'quota_reset_time': '',
-                'remaining': 0
-            }
+        today = config.now_local().date()
+        with self._quota_lock:
+            if today != self._quota_day:
+                self._quota_day = today
+                self._calls_today = 0
+            used = self._calls_today
+            reset_time = config.localize(datetime.combine(
+                self._quota_day + timedelta(days=1), datetime.min.time()))
+
+        return {
+            'queries_used': used,
+            'queries_limit': config.API_QUOTA_PER_DAY,
+            'quota_reset_time': reset_time.isoformat(),
+            'remaining': max(config.API_QUOTA_PER_DAY - used, 0)
+        }
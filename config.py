@@ -1,5 +1,6 @@
-import pytz
+from datetime import datetime
 from pathlib import Path
+from types import MappingProxyType
 
 # Application Settings
 APP_NAME = "Article Rewriter Pro"
@@ -27,13 +28,20 @@ UI_COLORS = {
 }
 
 # Logging Settings
-LOG_LEVELS = ["ALL", "INFO", "WARNING", "ERROR", "SUCCESS", "DEBUG"]
+LOG_LEVELS = ("ALL", "INFO", "WARNING", "ERROR", "SUCCESS", "DEBUG")
 MAX_LOG_HISTORY = 500
+LOG_UPDATE_INTERVAL = 100  # milliseconds
 
 # API Settings
 API_TIMEOUT = 30  # seconds
 MAX_RETRIES = 3
 RETRY_DELAY = 1  # seconds
+API_QPS = 2      # sustained Blogger API requests per second
+API_BURST = 10   # requests allowed in a burst before pacing kicks in
+API_QUOTA_PER_DAY = 10000  # Blogger API default daily query quota
+AI_CACHE_SIZE = 1024  # AI responses kept in memory
+AI_CACHE_TTL = 3600   # seconds before a cached AI response expires
+AI_MAX_WORKERS = 4    # concurrent Gemini requests per article
 
 # Article Processing
 MAX_ARTICLE_LENGTH = 50000  # characters
@@ -41,11 +49,31 @@ MIN_ARTICLE_LENGTH = 100    # characters
 MAX_TITLE_LENGTH = 100     # characters
 
 # Scheduling
-TIMEZONE = pytz.timezone('Asia/Jakarta')
+try:
+    from zoneinfo import ZoneInfo
+    TIMEZONE = ZoneInfo('Asia/Jakarta')
+except (ImportError, KeyError):
+    # No zoneinfo module or no tz database (e.g. Windows without tzdata)
+    import pytz
+    TIMEZONE = pytz.timezone('Asia/Jakarta')
 DEFAULT_SCHEDULE_INTERVAL = 5  # minutes
 MIN_SCHEDULE_INTERVAL = 1      # minutes
 MAX_SCHEDULE_INTERVAL = 1440   # minutes (24 hours)
 
+def now_local() -> datetime:
+    """Return the current time as an aware datetime in TIMEZONE."""
+    return datetime.now(TIMEZONE)
+
+def localize(dt: datetime) -> datetime:
+    """Attach TIMEZONE to a naive local datetime.
+    
+    pytz zones must go through localize(); passing them as tzinfo picks the
+    zone's historical LMT offset instead of the current one.
+    """
+    if hasattr(TIMEZONE, 'localize'):
+        return TIMEZONE.localize(dt)
+    return dt.replace(tzinfo=TIMEZONE)
+
 # Progress Bar Settings
 PROGRESS_UPDATE_INTERVAL = 100  # milliseconds
 
@@ -63,14 +91,14 @@ PREVIEW_FONT_SIZE = 10
 PREVIEW_WRAP_LENGTH = 80  # characters
 
 # HTML Settings
-ALLOWED_HTML_TAGS = [
+ALLOWED_HTML_TAGS = frozenset({
     'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
     'p', 'br', 'hr',
     'ul', 'ol', 'li',
     'strong', 'em', 'u', 'strike',
     'blockquote', 'pre', 'code',
     'table', 'thead', 'tbody', 'tr', 'th', 'td'
-]
+})
 
 # Button Styles
 BUTTON_STYLES = {
@@ -153,3 +181,17 @@ PROGRESS_STYLES = {
     "background": UI_COLORS["background"],
     "foreground": UI_COLORS["primary"]
 }
+
+# Style tables are read-only at runtime
+UI_COLORS = MappingProxyType(UI_COLORS)
+TREE_COLUMN_WIDTHS = MappingProxyType(TREE_COLUMN_WIDTHS)
+BUTTON_STYLES = MappingProxyType({
+    name: MappingProxyType(style) for name, style in BUTTON_STYLES.items()
+})
+TAB_STYLES = MappingProxyType(TAB_STYLES)
+FRAME_STYLES = MappingProxyType(FRAME_STYLES)
+ENTRY_STYLES = MappingProxyType(ENTRY_STYLES)
+LABEL_STYLES = MappingProxyType(LABEL_STYLES)
+TREEVIEW_STYLES = MappingProxyType(TREEVIEW_STYLES)
+DIALOG_STYLES = MappingProxyType(DIALOG_STYLES)
+PROGRESS_STYLES = MappingProxyType(PROGRESS_STYLES)
@@ -1,7 +1,119 @@
 import re
-import google.generativeai as genai
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
-import requests
+import soupsieve
+
+import config
+from utils import create_http_session
+
+# google.generativeai pulls in googleapiclient and the gRPC stack, so it is
+# imported on first use rather than at application start.
+
+# Precompiled patterns for the text and HTML processing helpers
+_RE_WS = re.compile(r'\s+')
+_RE_SENT_SPLIT = re.compile(r'(?<=[.!?])\s+(?=[A-Z])')
+_RE_HTML_STRUCTURE = re.compile(r'<h2>|<h3>|<p>')
+_RE_REMOVE = re.compile(r'<script.*?>.*?</script>|<style.*?>.*?</style>|<!--.*?-->',
+                        re.DOTALL | re.IGNORECASE)
+# Adjacent elements that get an empty paragraph between them, matched in one
+# pass; the group that matched selects the replacement
+_RE_SPACING = re.compile(r'</(h2)>\s*<h2>|</(h3)>\s*<h3>|</(p)>\s*<p>|</(ul)>\s*(?=<)')
+_SPACING_REPLACEMENTS = {
+    'h2': '</h2>\n<p></p>\n<h2>',
+    'h3': '</h3>\n<p></p>\n<h3>',
+    'p': '</p>\n<p></p>\n<p>',
+    'ul': '</ul>\n<p></p>\n',
+}
+_RE_LINE_BREAK = re.compile(r'\n|<br\s*/?>|</div>')
+_RE_LEADING_TAG = re.compile(r'^<(h2|h3|p|ul|/ul|li|/li)>')
+_RE_HEADING_PRESENT = re.compile(r'<h[23][^>]*>')
+_RE_CODE_FENCE = re.compile(r'^\s*```(?:json)?|```\s*$')
+
+def _retryable_ai_errors():
+    """Return the Gen AI failures worth retrying.
+    
+    Anything else (bad request, safety block, auth) fails the same way on
+    every attempt.
+    """
+    from google.api_core import exceptions as google_exceptions
+    return (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.InternalServerError,
+    )
+
+# Upper bound on a single retry wait, in seconds
+_MAX_AI_BACKOFF = 30
+# Models and output token budgets. gemini-pro caps replies at 2048 tokens;
+# the JSON rewrite carries the title, tags and every section's HTML in one
+# reply and a truncated reply cannot be parsed, so it goes to a model whose
+# output limit is 8192 tokens
+_DEFAULT_MODEL = 'gemini-pro'
+_DEFAULT_MAX_TOKENS = 2048
+_JSON_REWRITE_MODEL = 'gemini-1.5-flash'
+_JSON_REWRITE_MAX_TOKENS = 8192
+
+# Main-content selectors in priority order, plus one compound pattern so the
+# page is traversed once to collect every candidate
+_CONTENT_SELECTORS = (
+    'article',
+    '.post-content',
+    '.entry-content',
+    '.content',
+    'main',
+    '#content',
+    '.post',
+    '.article',
+    '.blog-post',
+)
+_CONTENT_PATTERNS = tuple(soupsieve.compile(selector) for selector in _CONTENT_SELECTORS)
+_CONTENT_PATTERN = soupsieve.compile(', '.join(_CONTENT_SELECTORS))
+
+# Empty paragraph used as a spacer between HTML elements
+_EMPTY_P = '<p></p>'
+_RE_EMPTY_P = re.compile(r'(<p></p>\s*){2,}')
+
+class _HTMLLineWriter:
+    """Buffer HTML parts one per line, collapsing runs of empty paragraphs."""
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._last_was_empty = False
+
+    def write(self, part):
+        """Append a part on its own line.
+        
+        Empty paragraphs that directly follow another empty paragraph are
+        dropped, so spacers never repeat.
+        """
+        if part.count(_EMPTY_P) > 1:
+            # Rare: raw markup carrying its own run of spacers
+            part = _RE_EMPTY_P.sub(_EMPTY_P + '\n', part).rstrip('\n')
+        
+        if self._last_was_empty:
+            while part.startswith(_EMPTY_P):
+                part = part[len(_EMPTY_P):].lstrip()
+            if not part:
+                return
+        
+        self._buffer.write(part)
+        self._buffer.write('\n')
+        self._last_was_empty = part.endswith(_EMPTY_P)
+
+    def getvalue(self):
+        """Return the buffered HTML."""
+        return self._buffer.getvalue()
+
+# Shared session so article fetches reuse pooled keep-alive connections
+_SESSION = create_http_session(pool_connections=32, pool_maxsize=64)
 
 class ArticleRewriterEngine:
     def __init__(self, api_key=None, logger_callback=None):
@@ -13,6 +125,8 @@ class ArticleRewriterEngine:
         """
         self.api_key = api_key
         self.logger = logger_callback or print
+        self._response_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
         self._configure_ai()
 
     def log(self, message, level="INFO"):
@@ -24,6 +138,7 @@ class ArticleRewriterEngine:
         """Configure the Google Generative AI service."""
         if self.api_key:
             try:
+                import google.generativeai as genai
                 genai.configure(api_key=self.api_key)
                 self.log("Configured Google AI service", level="INFO")
             except Exception as e:
@@ -48,30 +163,23 @@ class ArticleRewriterEngine:
             str: The article content, or None if fetching failed
         """
         try:
-            response = requests.get(url)
+            response = _SESSION.get(url, timeout=config.API_TIMEOUT)
             response.raise_for_status()
             
-            # Parse HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
+            # Parse the raw bytes with the C-backed lxml parser, which detects
+            # the encoding itself instead of requests guessing it first
+            soup = BeautifulSoup(response.content, 'lxml')
             
             # Try to find the main content
             content = ""
             
-            # Common content selectors
-            content_selectors = [
-                'article',
-                '.post-content',
-                '.entry-content',
-                '.content',
-                'main',
-                '#content',
-                '.post',
-                '.article',
-                '.blog-post'
-            ]
+            # Collect candidates in one pass, then pick by selector priority;
+            # candidates are in document order, as select_one would return
+            candidates = _CONTENT_PATTERN.select(soup)
             
-            for selector in content_selectors:
-                content_element = soup.select_one(selector)
+            for pattern in _CONTENT_PATTERNS:
+                content_element = next(
+                    (element for element in candidates if pattern.match(element)), None)
                 if content_element:
                     # Remove unwanted elements
                     for element in content_element.select('script, style, iframe, .comments, .sidebar, .nav, .menu, .advertisement'):
@@ -110,25 +218,36 @@ class ArticleRewriterEngine:
             if not article_text or not isinstance(article_text, str):
                 raise ValueError("Invalid article text provided")
 
-            # Split into sections for better processing
-            sections = self.split_into_sections(article_text)
-            
-            # Generate new title if needed
-            new_title = self.generate_new_title(sections[0] if sections else article_text)
-            if not new_title and title:
-                new_title = title
-
-            # Prepare rewriting prompt
-            prompt = self._create_rewrite_prompt(article_text)
+            # Title, tags and sectioned content come back from a single call
+            response = self._call_ai_api(
+                self._create_rewrite_prompt(article_text),
+                model_name=_JSON_REWRITE_MODEL,
+                max_tokens=_JSON_REWRITE_MAX_TOKENS,
+                cache_if=lambda text: self._parse_rewrite_response(text) is not None)
             
-            # Call AI for rewriting
-            rewritten_content = self._call_ai_api(prompt)
-            
-            if not rewritten_content:
+            if not response:
                 raise ValueError("Failed to generate rewritten content")
 
+            rewrite = self._parse_rewrite_response(response)
+            if rewrite:
+                new_title = rewrite['title'] or title
+                tags = rewrite['tags']
+                rewritten_content = '\n'.join(
+                    f"<h2>{section['heading']}</h2>\n{section['html']}" if section['heading']
+                    else section['html']
+                    for section in rewrite['sections']
+                )
+            else:
+                # The model ignored the JSON format; fall back to a plain HTML rewrite
+                self.log("AI response was not valid JSON, retrying as plain HTML...", level="WARNING")
+                new_title = title
+                tags = []
+                rewritten_content = self._call_ai_api(self._create_html_rewrite_prompt(article_text))
+                if not rewritten_content:
+                    raise ValueError("Failed to generate rewritten content")
+
             # Ensure proper HTML structure
-            if not re.search(r'<h2>|<h3>|<p>', rewritten_content):
+            if not _RE_HTML_STRUCTURE.search(rewritten_content):
                 self.log("AI response missing HTML structure, applying formatting...", level="WARNING")
                 rewritten_content = self.format_html_content(rewritten_content, new_title)
             
@@ -138,6 +257,7 @@ class ArticleRewriterEngine:
             return {
                 'title': new_title,
                 'content': rewritten_content,
+                'tags': tags,
                 'original_title': title,
                 'original_content': article_text
             }
@@ -147,7 +267,76 @@ class ArticleRewriterEngine:
             return None
 
     def _create_rewrite_prompt(self, article_text):
-        """Create the prompt for article rewriting."""
+        """Create the prompt asking for the title, tags and content as JSON."""
+        return f"""Tulis ulang artikel berikut dan kembalikan hasilnya HANYA sebagai objek JSON yang valid.
+
+Artikel Asli:
+{article_text}
+
+FORMAT JSON (WAJIB DIIKUTI):
+{{
+  "title": "Judul baru artikel",
+  "tags": ["tag pertama", "tag kedua", "tag ketiga"],
+  "sections": [
+    {{"heading": "Judul bagian", "html": "<p>Paragraf pertama</p><p>Paragraf kedua</p>"}}
+  ]
+}}
+
+ATURAN WAJIB:
+- "title": judul menarik dan informatif dalam Bahasa Indonesia, 40-60 karakter, mencerminkan isi dengan akurat dan tidak menyesatkan
+- "tags": 3-5 tag yang relevan dengan isi artikel
+- Artikel harus dibagi menjadi beberapa bagian, masing-masing dengan "heading" sendiri
+- "html" setiap bagian harus memiliki minimal 2-3 paragraf
+- Setiap paragraf harus dibungkus tag <p>
+- Sub-heading di dalam bagian menggunakan tag <h3>
+- Daftar harus menggunakan format <ul><li>Item</li></ul>
+- Gunakan Bahasa Indonesia yang baik dan benar
+- Jangan hilangkan informasi penting dari artikel asli
+- Jangan tulis teks apa pun di luar objek JSON
+
+JSON:"""
+
+    def _parse_rewrite_response(self, response):
+        """Parse the JSON rewrite response.
+        
+        Args:
+            response (str): Raw AI response text
+            
+        Returns:
+            dict: 'title', 'tags' and 'sections' (each with 'heading' and
+                'html'), or None if the response is not in the expected format
+        """
+        try:
+            data = json.loads(_RE_CODE_FENCE.sub('', response).strip())
+        except ValueError:
+            return None
+
+        if not isinstance(data, dict) or not isinstance(data.get('sections'), list):
+            return None
+
+        sections = [
+            {
+                'heading': str(section.get('heading') or '').strip(),
+                'html': section['html'].strip()
+            }
+            for section in data['sections']
+            if isinstance(section, dict) and isinstance(section.get('html'), str)
+            and section['html'].strip()
+        ]
+        if not sections:
+            return None
+
+        title = data.get('title')
+        tags = data.get('tags')
+        return {
+            'title': title.strip('"\' ').capitalize()[:255] if isinstance(title, str) else None,
+            'tags': [tag.strip() for tag in tags if isinstance(tag, str) and tag.strip()][:5]
+                    if isinstance(tags, list) else [],
+            'sections': sections
+        }
+
+    def _create_html_rewrite_prompt(self, article_text):
+        """Create the prompt for a plain HTML article rewrite."""
         return f"""Tulis ulang artikel berikut dalam format HTML yang terstruktur.
 
 Artikel Asli:
@@ -174,19 +363,44 @@ ATURAN WAJIB:
 
 Mohon tulis ulang artikel dengan format di atas:"""
 
-    def _call_ai_api(self, prompt, max_retries=3):
-        """Call the Google Generative AI API with retries."""
+    def _call_ai_api(self, prompt, max_retries=3, model_name=_DEFAULT_MODEL,
+                     max_tokens=_DEFAULT_MAX_TOKENS, cache_if=None):
+        """Call the Google Generative AI API with retries.
+        
+        Only transient failures (rate limits, unavailability, timeouts) are
+        retried, with exponential backoff; other errors fail immediately.
+        
+        Responses are cached by prompt, model and generation settings, so an
+        identical request is answered from memory without an API call.
+        
+        Args:
+            prompt (str): The prompt to send
+            max_retries (int): Attempts made on transient errors
+            model_name (str): Gen AI model to call
+            max_tokens (int): Maximum number of output tokens, within the
+                model's output limit
+            cache_if (callable): Optional check on the response text; replies
+                it rejects are returned but not cached
+        """
         try:
-            # Configure the model
-            model = genai.GenerativeModel('gemini-pro')
-            
             generation_config = {
                 "temperature": 0.7,
                 "top_p": 0.8,
                 "top_k": 40,
-                "max_output_tokens": 2048,
+                "max_output_tokens": max_tokens,
             }
             
+            cache_key = self._make_cache_key(prompt, model_name, generation_config)
+            cached = self._get_cached_response(cache_key)
+            if cached is not None:
+                return cached
+            
+            import google.generativeai as genai
+            retryable_errors = _retryable_ai_errors()
+            
+            # Configure the model
+            model = genai.GenerativeModel(model_name)
+            
             safety_settings = [
                 {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
                 {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
@@ -203,11 +417,20 @@ Mohon tulis ulang artikel dengan format di atas:"""
                     )
                     
                     if response.text:
-                        return response.text.strip()
+                        text = response.text.strip()
+                        if cache_if is None or cache_if(text):
+                            self._store_cached_response(cache_key, text)
+                        return text
                         
-                except Exception as e:
+                except retryable_errors as e:
                     if attempt == max_retries - 1:
                         raise
+                    # Exponential backoff with jitter
+                    wait_time = min(config.RETRY_DELAY * (2 ** attempt) * (0.5 + random.random()),
+                                    _MAX_AI_BACKOFF)
+                    self.log(f"Transient Gen AI error, retrying in {wait_time:.1f} seconds: {str(e)}",
+                             level="WARNING")
+                    time.sleep(wait_time)
                     continue
             
             raise Exception("Failed to get valid response after multiple attempts")
@@ -216,6 +439,39 @@ Mohon tulis ulang artikel dengan format di atas:"""
             self.log(f"Error calling Gen AI API: {str(e)}", level="ERROR")
             return None
 
+    @staticmethod
+    def _make_cache_key(prompt, model_name, generation_config):
+        """Build the response cache key for a prompt and its model settings."""
+        payload = json.dumps({
+            "prompt": prompt,
+            "model": model_name,
+            "config": generation_config,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _get_cached_response(self, cache_key):
+        """Return a cached AI response, or None if missing or expired."""
+        with self._cache_lock:
+            entry = self._response_cache.get(cache_key)
+            if entry is None:
+                return None
+            
+            stored_at, text = entry
+            if time.monotonic() - stored_at > config.AI_CACHE_TTL:
+                del self._response_cache[cache_key]
+                return None
+            
+            self._response_cache.move_to_end(cache_key)
+            return text
+
+    def _store_cached_response(self, cache_key, text):
+        """Store an AI response, evicting the least recently used entries."""
+        with self._cache_lock:
+            self._response_cache[cache_key] = (time.monotonic(), text)
+            self._response_cache.move_to_end(cache_key)
+            while len(self._response_cache) > config.AI_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+
     def generate_new_title(self, content):
         """Generate a new title for the article using AI."""
         try:
@@ -251,18 +507,21 @@ Judul dalam Bahasa Indonesia:"""
 
     def split_into_sections(self, text):
         """Split text into logical sections."""
-        text = re.sub(r'\s+', ' ', text)
-        sections = re.split(r'(?<=[.!?])\s+(?=[A-Z])', text)
+        text = _RE_WS.sub(' ', text)
+        sections = _RE_SENT_SPLIT.split(text)
         
         min_section_length = 200
         grouped_sections = []
         current_section = []
+        current_length = 0
         
         for section in sections:
             current_section.append(section)
-            if sum(len(s) for s in current_section) >= min_section_length:
+            current_length += len(section)
+            if current_length >= min_section_length:
                 grouped_sections.append(' '.join(current_section))
                 current_section = []
+                current_length = 0
         
         if current_section:
             grouped_sections.append(' '.join(current_section))
@@ -273,41 +532,35 @@ Judul dalam Bahasa Indonesia:"""
         """Clean and structure HTML content."""
         try:
             # Remove problematic elements
-            html_content = re.sub(r'<script.*?>.*?</script>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
-            html_content = re.sub(r'<style.*?>.*?</style>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
-            html_content = re.sub(r'<!--.*?-->', '', html_content, flags=re.DOTALL)
+            html_content = _RE_REMOVE.sub('', html_content)
             
             # Clean up whitespace
             html_content = html_content.replace('&nbsp;', ' ')
-            html_content = re.sub(r'\s+', ' ', html_content)
+            html_content = _RE_WS.sub(' ', html_content)
             
             # Ensure proper spacing between elements
-            html_content = re.sub(r'</h2>\s*<h2>', '</h2>\n<p></p>\n<h2>', html_content)
-            html_content = re.sub(r'</h3>\s*<h3>', '</h3>\n<p></p>\n<h3>', html_content)
-            html_content = re.sub(r'</p>\s*<p>', '</p>\n<p></p>\n<p>', html_content)
-            html_content = re.sub(r'</ul>\s*<', '</ul>\n<p></p>\n<', html_content)
+            html_content = _RE_SPACING.sub(
+                lambda m: _SPACING_REPLACEMENTS[m.group(m.lastindex)], html_content)
             
             # Process paragraphs
-            paragraphs = re.split(r'\n|<br\s*/?>|</div>', html_content)
-            formatted_parts = []
+            paragraphs = _RE_LINE_BREAK.split(html_content)
+            writer = _HTMLLineWriter()
             
             for p in paragraphs:
                 p = p.strip()
                 if not p:
                     continue
                 
-                if re.match(r'^<(h2|h3|p|ul|/ul|li|/li)>', p):
-                    formatted_parts.append(p)
+                if _RE_LEADING_TAG.match(p):
+                    writer.write(p)
                 else:
-                    formatted_parts.append(f'<p>{p}</p>')
-                    formatted_parts.append('<p></p>')
+                    writer.write(f'<p>{p}</p>')
+                    writer.write(_EMPTY_P)
             
-            # Join and clean up
-            html_content = '\n'.join(formatted_parts)
-            html_content = re.sub(r'(<p></p>\s*){2,}', '<p></p>\n', html_content)
+            html_content = writer.getvalue()
             
             # Ensure there's at least one heading
-            if not re.search(r'<h[23][^>]*>', html_content):
+            if not _RE_HEADING_PRESENT.search(html_content):
                 html_content = f'<h2>Artikel</h2>\n<p></p>\n{html_content}'
             
             return html_content.strip()
@@ -349,21 +602,22 @@ Judul dalam Bahasa Indonesia:"""
         """
         try:
             # Clean up whitespace
-            content = re.sub(r'\s+', ' ', content).strip()
+            content = _RE_WS.sub(' ', content).strip()
             
             # Split into paragraphs
             paragraphs = content.split('\n\n')
             if len(paragraphs) == 1:
                 # If no paragraph breaks, split on sentences
-                paragraphs = re.split(r'(?<=[.!?])\s+(?=[A-Z])', content)
+                paragraphs = _RE_SENT_SPLIT.split(content)
             
             # Start with title if provided
-            formatted_parts = []
+            writer = _HTMLLineWriter()
             if title:
-                formatted_parts.append(f'<h2>{title}</h2>')
-                formatted_parts.append('<p></p>')
+                writer.write(f'<h2>{title}</h2>')
+                writer.write(_EMPTY_P)
             
-            # Process each paragraph
+            # Group paragraphs into sections of a few paragraphs each
+            sections = []
             current_section = []
             for i, p in enumerate(paragraphs):
                 p = p.strip()
@@ -372,37 +626,37 @@ Judul dalam Bahasa Indonesia:"""
                 
                 # Start new section every few paragraphs
                 if i > 0 and i % 3 == 0 and current_section:
-                    # Join current section
-                    section_text = ' '.join(current_section)
-                    
-                    # Generate section heading
-                    heading = self.generate_section_heading(section_text)
-                    if heading:
-                        formatted_parts.append(f'<h2>{heading}</h2>')
-                        formatted_parts.append('<p></p>')
-                    
-                    # Add section paragraphs
-                    for section_p in current_section:
-                        formatted_parts.append(f'<p>{section_p}</p>')
-                        formatted_parts.append('<p></p>')
-                    
+                    sections.append(current_section)
                     current_section = []
                 
                 current_section.append(p)
             
-            # Add remaining paragraphs
-            if current_section:
-                for p in current_section:
-                    formatted_parts.append(f'<p>{p}</p>')
-                    formatted_parts.append('<p></p>')
-            
-            # Join all parts
-            html_content = '\n'.join(formatted_parts)
+            # Generate the section headings concurrently; the trailing
+            # paragraphs in current_section get no heading
+            headings = []
+            if sections:
+                with ThreadPoolExecutor(max_workers=min(len(sections), config.AI_MAX_WORKERS)) as executor:
+                    headings = list(executor.map(
+                        self.generate_section_heading,
+                        [' '.join(section) for section in sections]
+                    ))
+            
+            for heading, section in zip(headings, sections):
+                if heading:
+                    writer.write(f'<h2>{heading}</h2>')
+                    writer.write(_EMPTY_P)
+                
+                # Add section paragraphs
+                for section_p in section:
+                    writer.write(f'<p>{section_p}</p>')
+                    writer.write(_EMPTY_P)
             
-            # Clean up multiple empty paragraphs
-            html_content = re.sub(r'(<p></p>\s*){2,}', '<p></p>\n', html_content)
+            # Add remaining paragraphs
+            for p in current_section:
+                writer.write(f'<p>{p}</p>')
+                writer.write(_EMPTY_P)
             
-            return html_content.strip()
+            return writer.getvalue().strip()
             
         except Exception as e:
             self.log(f"Error formatting HTML content: {str(e)}", level="ERROR")
@@ -440,7 +694,7 @@ Heading only:"""
             if heading:
                 # Clean up the heading
                 heading = heading.strip('"\'').strip()
-                heading = re.sub(r'\s+', ' ', heading)
+                heading = _RE_WS.sub(' ', heading)
                 heading = heading[:100]  # Limit length
                 return heading.capitalize()
             
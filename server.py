@@ -1,15 +1,168 @@
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import json
 import os
 import socket
+import threading
 import logging
 
+import requests
+
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder
+    orjson = None
+
+try:
+    import xxhash
+except ImportError:  # Fall back to hashlib for article IDs
+    xxhash = None
+
+from utils import create_http_session
+
 # Configure basic logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 import sys
 
+# Maximum number of article pages fetched concurrently
+MAX_FETCH_WORKERS = 32
+
+# Maximum number of fetches one request keeps in flight on the shared pool,
+# so a large sitemap cannot queue ahead of every other client
+MAX_FETCHES_PER_REQUEST = 8
+
+# Maximum number of article previews kept for conditional re-fetches
+PREVIEW_CACHE_SIZE = 4096
+
+# Number of characters of article text shown in a preview
+PREVIEW_LENGTH = 500
+
+# Largest request body accepted by POST handlers, in bytes
+MAX_BODY_SIZE = 8 * 1024 * 1024
+
+# Shared session so article fetches reuse pooled keep-alive connections
+_SESSION = create_http_session(pool_connections=64, pool_maxsize=64)
+
+# Long-lived pool for article fetches, shared by all requests so threads
+# are not spun up and torn down per sitemap
+_FETCH_EXECUTOR = ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS,
+                                     thread_name_prefix='article-fetch')
+
+# Article previews keyed by URL: url -> (etag, last_modified, title, content)
+_PREVIEW_CACHE = OrderedDict()
+_PREVIEW_CACHE_LOCK = threading.Lock()
+
+def _get_cached_preview(article_url):
+    """Return the cached preview entry for a URL, marking it recently used"""
+    with _PREVIEW_CACHE_LOCK:
+        entry = _PREVIEW_CACHE.get(article_url)
+        if entry is not None:
+            _PREVIEW_CACHE.move_to_end(article_url)
+        return entry
+
+def _store_cached_preview(article_url, etag, last_modified, title, content):
+    """Cache a preview with its validators, evicting the least recently used"""
+    with _PREVIEW_CACHE_LOCK:
+        _PREVIEW_CACHE[article_url] = (etag, last_modified, title, content)
+        _PREVIEW_CACHE.move_to_end(article_url)
+        while len(_PREVIEW_CACHE) > PREVIEW_CACHE_SIZE:
+            _PREVIEW_CACHE.popitem(last=False)
+
+def dumps_json(data):
+    """Serialize data to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def loads_json(payload):
+    """Parse JSON from raw request bytes"""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload.decode('utf-8'))
+
+def article_id(article_url):
+    """Return a short, stable, non-cryptographic ID for an article URL"""
+    if xxhash is not None:
+        return xxhash.xxh64_hexdigest(article_url)
+    return hashlib.blake2b(article_url.encode(), digest_size=8).hexdigest()
+
+def fetch_article_preview(article_url, fallback_title):
+    """Fetch an article page and return its title and a short text preview
+
+    Pages fetched before are requested conditionally with their ETag or
+    Last-Modified validator, and a 304 reuses the cached preview without
+    downloading or parsing the page again.
+    """
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    try:
+        headers = {}
+        cached = _get_cached_preview(article_url)
+        if cached:
+            etag, last_modified = cached[0], cached[1]
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        article_response = _SESSION.get(article_url, headers=headers, timeout=5)
+        if cached and article_response.status_code == 304:
+            return cached[2], cached[3]
+
+        # Only the title and paragraph text are needed
+        article_soup = BeautifulSoup(article_response.content, 'lxml',
+                                     parse_only=SoupStrainer(['title', 'p']))
+        title_tag = article_soup.find('title')
+        title = title_tag.string if title_tag else fallback_title
+        if title_tag:
+            title_tag.extract()
+        # Collect text only until the preview is full rather than joining
+        # the whole page and slicing it
+        parts = []
+        length = 0
+        for text in article_soup.strings:
+            parts.append(text)
+            length += len(text)
+            if length >= PREVIEW_LENGTH:
+                break
+        content = ''.join(parts)[:PREVIEW_LENGTH] + "..."
+
+        etag = article_response.headers.get('ETag')
+        last_modified = article_response.headers.get('Last-Modified')
+        if article_response.status_code == 200 and (etag or last_modified):
+            _store_cached_preview(article_url, etag, last_modified, title, content)
+    except Exception as e:
+        logger.warning(f"Could not fetch article content: {str(e)}")
+        title = fallback_title
+        content = "Content not available"
+
+    return title, content
+
+def fetch_article_previews(article_urls, fallback_titles):
+    """Fetch previews for several articles on the shared pool, in input order
+
+    At most MAX_FETCHES_PER_REQUEST fetches are queued or running at a time,
+    so other requests' fetches interleave with a long sitemap instead of
+    waiting behind all of it.
+    """
+    slots = threading.BoundedSemaphore(MAX_FETCHES_PER_REQUEST)
+    futures = []
+    for article_url, fallback_title in zip(article_urls, fallback_titles):
+        slots.acquire()
+        future = _FETCH_EXECUTOR.submit(fetch_article_preview, article_url, fallback_title)
+        future.add_done_callback(lambda _: slots.release())
+        futures.append(future)
+    return [future.result() for future in futures]
+
 class CustomRequestHandler(SimpleHTTPRequestHandler):
+    # Every response carries a Content-Length, so connections can be kept alive
+    protocol_version = 'HTTP/1.1'
+    # Seconds an idle keep-alive connection may hold its thread
+    timeout = 60
+
     def __init__(self, *args, **kwargs):
         # Call parent constructor
         super().__init__(*args, **kwargs)
@@ -26,20 +179,31 @@ class CustomRequestHandler(SimpleHTTPRequestHandler):
 
     def do_POST(self):
         """Handle POST requests"""
+        # Validate the declared size before reading anything into memory
         try:
-            # Read request body first to avoid sending headers if body read fails
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
-            
-            # Enable CORS and set response headers
-            self.send_response(200)
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
+            content_length = int(self.headers.get('Content-Length', '0'))
+        except ValueError:
+            content_length = -1
+        if content_length < 0:
+            self.send_error(400, "Invalid Content-Length")
+            return
+        if content_length > MAX_BODY_SIZE:
+            self.send_error(413, "Payload Too Large")
+            return
+
+        post_data = self.rfile.read(content_length)
+        try:
+            data = loads_json(post_data)
+        except ValueError as e:
+            logger.warning(f"Rejected malformed JSON body: {str(e)}")
+            self.send_json(400, {
+                'error': str(e),
+                'status': 'error',
+                'message': 'Request body is not valid JSON'
+            })
+            return
 
+        try:
             response_data = {}
 
             if self.path == '/api/blogs':
@@ -68,43 +232,37 @@ class CustomRequestHandler(SimpleHTTPRequestHandler):
                     raise ValueError("Sitemap URL is required")
 
                 try:
-                    import requests
-                    from bs4 import BeautifulSoup
-                    import hashlib
+                    from bs4 import BeautifulSoup, SoupStrainer
                     
                     # Fetch the sitemap
-                    response = requests.get(sitemap_url, timeout=10)
+                    response = _SESSION.get(sitemap_url, timeout=10)
                     response.raise_for_status()
                     
-                    # Parse the XML
-                    soup = BeautifulSoup(response.content, 'xml')
+                    # Parse only the <url> entries of the XML
+                    soup = BeautifulSoup(response.content, 'xml',
+                                         parse_only=SoupStrainer('url'))
                     urls = soup.find_all('url')
                     
-                    articles = []
+                    article_urls = []
+                    fallback_titles = []
                     for i, url in enumerate(urls):
                         loc = url.find('loc')
                         if loc:
-                            article_url = loc.text
+                            article_urls.append(loc.text)
+                            fallback_titles.append(f"Article {i+1}")
+                    
+                    # Fetch the article pages concurrently, preserving order
+                    previews = fetch_article_previews(article_urls, fallback_titles)
+                    
+                    articles = []
+                    for article_url, (title, content) in zip(article_urls, previews):
+                        articles.append({
                             # Generate a unique ID based on URL
-                            article_id = hashlib.md5(article_url.encode()).hexdigest()
-                            
-                            # Try to fetch article title
-                            try:
-                                article_response = requests.get(article_url, timeout=5)
-                                article_soup = BeautifulSoup(article_response.content, 'html.parser')
-                                title = article_soup.title.string if article_soup.title else f"Article {i+1}"
-                                content = article_soup.get_text()[:500] + "..."  # Get first 500 chars
-                            except Exception as e:
-                                logger.warning(f"Could not fetch article content: {str(e)}")
-                                title = f"Article {i+1}"
-                                content = "Content not available"
-                            
-                            articles.append({
-                                'id': article_id,
-                                'title': title,
-                                'url': article_url,
-                                'content': content
-                            })
+                            'id': article_id(article_url),
+                            'title': title,
+                            'url': article_url,
+                            'content': content
+                        })
                     
                     response_data = {'articles': articles}
                     logger.info(f"Successfully fetched {len(articles)} articles from sitemap")
@@ -120,25 +278,35 @@ class CustomRequestHandler(SimpleHTTPRequestHandler):
                 # Simulate posting to blog
                 response_data = {'success': True}
 
-            # Send response
-            self.wfile.write(json.dumps(response_data).encode())
-
         except Exception as e:
             # Log the error
             logger.error(f"POST request failed: {str(e)}")
             
             # Send error response with 500 status
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
             error_response = {
                 'error': str(e),
                 'status': 'error',
                 'message': 'Internal server error occurred'
             }
-            self.wfile.write(json.dumps(error_response).encode())
+            self.send_json(500, error_response)
+            return
+
+        # Send response
+        self.send_json(200, response_data)
+
+    def send_json(self, status, response_data):
+        """Serialize a JSON response once and send it with a Content-Length"""
+        payload = dumps_json(response_data)
+
+        # Enable CORS and set response headers
+        self.send_response(status)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
 
     def do_OPTIONS(self):
         """Handle OPTIONS requests for CORS"""
@@ -147,6 +315,7 @@ class CustomRequestHandler(SimpleHTTPRequestHandler):
             self.send_header('Access-Control-Allow-Origin', '*')
             self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
             self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+            self.send_header('Content-Length', '0')
             self.end_headers()
         except Exception as e:
             logger.error(f"OPTIONS request failed: {str(e)}")
@@ -173,7 +342,10 @@ def run_server(port=8000):
             sys.exit(1)
         
         server_address = ('', port)
-        httpd = HTTPServer(server_address, CustomRequestHandler)
+        # One thread per connection, so a slow sitemap fetch or an idle
+        # keep-alive client does not block other requests
+        httpd = ThreadingHTTPServer(server_address, CustomRequestHandler)
+        httpd.daemon_threads = True
         
         startup_msg = f"Server running on http://localhost:{port}"
         logger.info(startup_msg)
@@ -186,6 +358,7 @@ def run_server(port=8000):
             logger.info(shutdown_msg)
             print(shutdown_msg)
             httpd.server_close()
+            _FETCH_EXECUTOR.shutdown(wait=False, cancel_futures=True)
             sys.exit(0)
         except Exception as e:
             error_msg = f"Server error: {str(e)}"
@@ -5,6 +5,8 @@ import os
 import json
 import threading
 import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 from blogger_api import BloggerAPIHandler
 from rewriter import ArticleRewriterEngine
@@ -26,6 +28,8 @@ class ArticleRewriterUI(tk.Tk):
         
         # Initialize managers after UI
         self.logger = Logger(max_history=config.MAX_LOG_HISTORY)
+        self.logger.add_callback(self._queue_log_entry)
+        self._poll_workers()
         self.config_manager = ConfigManager(config.SETTINGS_FILE, self.logger)
         self.blogger_api = BloggerAPIHandler(self.logger.log)
         self.rewriter = ArticleRewriterEngine(logger_callback=self.logger.log)
@@ -53,6 +57,22 @@ class ArticleRewriterUI(tk.Tk):
         self.article_schedules = {}
         self.hover_window = None
         
+        # Worker threads for network-bound handlers, so Tk never blocks on I/O
+        self._io_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='ui-io')
+        # Blogger calls share one httplib2 connection, which is not
+        # thread-safe, so they run one at a time on their own thread
+        self._api_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='blogger-api')
+        # Article rewrites get their own pool so a long batch does not hold
+        # up the other buttons
+        self._rewrite_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='rewrite')
+        
+        # Log entries waiting to be written to the log panel; filled from
+        # any thread, drained only on the Tk thread
+        self._log_queue = deque()
+        # Finished background tasks waiting for their on_done callback to run
+        # on the Tk thread, as (on_done, result) pairs
+        self._result_queue = deque()
+        
         # Schedule variables
         self.schedule_date_var = tk.StringVar()
         self.schedule_time_var = tk.StringVar()
@@ -104,15 +124,29 @@ class ArticleRewriterUI(tk.Tk):
             background="white"
         )
         
-        # Button style
-        style.configure("Primary.TButton",
-            font=("Segoe UI", 10),
-            background="#2980b9",
-            foreground="white"
+        # Button styles, e.g. "Primary.TButton" from config.BUTTON_STYLES["primary"]
+        for name, button_style in config.BUTTON_STYLES.items():
+            style_name = f"{name.title()}.TButton"
+            style.configure(style_name,
+                font=button_style["font"],
+                background=button_style["background"],
+                foreground=button_style["foreground"]
+            )
+            style.map(style_name,
+                background=[("active", button_style["activebackground"])],
+                foreground=[("active", button_style["activeforeground"])]
+            )
+        
+        # Treeview style
+        style.configure("Custom.Treeview",
+            background="white",
+            foreground="black",
+            fieldbackground="white",
+            rowheight=config.TREE_ROW_HEIGHT
         )
-        style.map("Primary.TButton",
-            background=[("active", "#3498db")],
-            foreground=[("active", "white")]
+        style.configure("Custom.Treeview.Heading",
+            font=("Segoe UI", 10, "bold"),
+            padding=5
         )
 
     def _init_ui(self):
@@ -243,19 +277,6 @@ class ArticleRewriterUI(tk.Tk):
         articles_frame = ttk.LabelFrame(parent, text="Articles", padding="10")
         articles_frame.pack(side="top", fill="both", expand=True, padx=5, pady=5)
         
-        # Create Treeview with modern style
-        style = ttk.Style()
-        style.configure("Custom.Treeview",
-            background="white",
-            foreground="black",
-            fieldbackground="white",
-            rowheight=25
-        )
-        style.configure("Custom.Treeview.Heading",
-            font=("Segoe UI", 10, "bold"),
-            padding=5
-        )
-        
         # Create Treeview
         self.articles_tree = ttk.Treeview(
             articles_frame,
@@ -398,6 +419,172 @@ class ArticleRewriterUI(tk.Tk):
         self.log_text.tag_config('SUCCESS', foreground='#27ae60')
         self.log_text.tag_config('DEBUG', foreground='#7f8c8d')
 
+    def _run_in_background(self, func, *args, on_done=None, executor=None):
+        """Run a blocking call on a worker thread.
+        
+        Args:
+            func (callable): The blocking function to run
+            *args: Arguments for func
+            on_done (callable): Optional function called on the Tk thread
+                with func's result
+            executor (Executor): Executor to run func on; defaults to the
+                shared I/O pool
+        """
+        def done(future):
+            error = future.exception()
+            if error is not None:
+                self.logger.log(f"Background task failed: {str(error)}", level="ERROR")
+            elif on_done:
+                # Hand the result back to the Tk thread; Tk itself must not
+                # be touched from this worker
+                self._result_queue.append((on_done, future.result()))
+        
+        (executor or self._io_executor).submit(func, *args).add_done_callback(done)
+
+    def authenticate_blogger(self):
+        """Authenticate with Blogger without blocking the UI."""
+        creds_path = self.creds_path_var.get()
+        if not creds_path:
+            messagebox.showerror("Error", "Please select a credentials file first")
+            return
+        
+        self.auth_status_var.set("Authenticating...")
+        self.authenticate_button.configure(state="disabled")
+        self._run_in_background(self.blogger_api.authenticate, creds_path,
+                                on_done=self._on_authenticated,
+                                executor=self._api_executor)
+
+    def _on_authenticated(self, success):
+        """Update the UI once authentication has finished."""
+        self.authenticate_button.configure(state="normal")
+        if success:
+            self.auth_status_var.set("Authenticated")
+            self.refresh_blogs()
+        else:
+            self.auth_status_var.set("Authentication failed")
+
+    def refresh_blogs(self):
+        """Reload the blog list without blocking the UI."""
+        self._run_in_background(self.blogger_api.refresh_blogs, on_done=self._on_blogs_refreshed,
+                                executor=self._api_executor)
+
+    def _on_blogs_refreshed(self, blogs):
+        """Fill the blog dropdown with the refreshed blog list."""
+        names = [blog['name'] for blog in blogs]
+        self.blog_dropdown['values'] = names
+        if names and self.blog_var.get() not in names:
+            self.blog_var.set(names[0])
+
+    def rewrite_articles(self):
+        """Rewrite the selected articles without blocking the UI."""
+        selected = self.articles_tree.selection()
+        if not selected:
+            messagebox.showinfo("Rewrite Articles", "Please select at least one article")
+            return
+        
+        api_key = self.api_key_var.get().strip()
+        if not api_key:
+            messagebox.showerror("Error", "Please enter your Google AI API key first")
+            return
+        if api_key != self.rewriter.api_key:
+            self.rewriter.set_api_key(api_key)
+        
+        for item in selected:
+            url = self.article_urls.get(item)
+            if url:
+                self._run_in_background(
+                    self._rewrite_article, url,
+                    on_done=lambda result, item=item: self._on_article_rewritten(item, result),
+                    executor=self._rewrite_executor)
+
+    def _rewrite_article(self, url):
+        """Fetch, rewrite and build the preview text for one article.
+        
+        Runs on a worker thread, so the network calls and the HTML
+        processing all stay off the Tk thread.
+        """
+        article_text = self.rewriter.fetch_article(url)
+        if not article_text:
+            return None
+        
+        result = self.rewriter.rewrite_article(article_text)
+        if not result:
+            return None
+        return result, self.html_formatter.extract_text(result['content'])
+
+    def _on_article_rewritten(self, item, rewrite):
+        """Store a finished rewrite and show it in the preview."""
+        if not rewrite:
+            self.logger.log(f"Could not rewrite article {item}", level="WARNING")
+            return
+        
+        result, preview = rewrite
+        self.rewritten_articles[item] = result
+        if self.articles_tree.exists(item):
+            self.articles_tree.set(item, "Title", result['title'])
+        
+        self.preview_text.delete('1.0', 'end')
+        self.preview_text.insert('1.0', preview)
+        self.logger.log(f"Rewrote article: {result['title']}", level="SUCCESS")
+
+    def save_log(self):
+        """Save the log history to a file chosen by the user.
+        
+        The file is written on a background thread so the UI stays responsive.
+        """
+        filepath = filedialog.asksaveasfilename(
+            defaultextension=".log",
+            filetypes=[("Log files", "*.log"), ("All files", "*.*")]
+        )
+        if filepath:
+            self.logger.save_to_file_async(filepath)
+
+    def _poll_workers(self):
+        """Run finished background callbacks and flush queued log entries.
+        
+        Worker threads only append to deques; this poll runs on the Tk thread
+        and reschedules itself every LOG_UPDATE_INTERVAL milliseconds.
+        """
+        self.after(config.LOG_UPDATE_INTERVAL, self._poll_workers)
+        
+        while self._result_queue:
+            on_done, result = self._result_queue.popleft()
+            try:
+                on_done(result)
+            except Exception as e:
+                self.logger.log(f"Error handling background result: {str(e)}", level="ERROR")
+        
+        self._flush_log()
+
+    def _queue_log_entry(self, entry):
+        """Queue a log entry for the log panel.
+        
+        Safe to call from any thread; the Tk thread picks the entry up on
+        its next _poll_workers poll.
+        """
+        self._log_queue.append(entry)
+
+    def _flush_log(self):
+        """Write all queued log entries to the log panel in a single insert."""
+        if not self._log_queue:
+            return
+        
+        level_filter = self.log_level_var.get()
+        
+        # Text.insert takes alternating text/tag arguments, so the whole batch
+        # goes in with one call
+        insert_args = []
+        while self._log_queue:
+            message, level = self._log_queue.popleft()
+            if level_filter == "ALL" or level == level_filter:
+                insert_args.extend((message + "\n", level))
+        
+        if insert_args:
+            self.log_text.configure(state='normal')
+            self.log_text.insert('end', *insert_args)
+            self.log_text.see('end')
+            self.log_text.configure(state='disabled')
+
     def _bind_events(self):
         """Bind various events to handlers."""
         self.articles_tree.bind('<<TreeviewSelect>>', self.on_article_selected)
@@ -1,19 +1,79 @@
+import io
 import json
+import mmap
 import os
-from datetime import datetime
+from collections import defaultdict, deque
 import re
-from typing import List, Dict, Optional, Callable
+import tempfile
+import threading
+import time
+from functools import lru_cache, partial
+from typing import Deque, List, Dict, Optional, Callable
+
+import lxml.html
+from lxml.html.clean import Cleaner
+import requests
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder
+    orjson = None
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+
+import config
+
+def create_http_session(pool_connections: int = 10, pool_maxsize: int = 10) -> requests.Session:
+    """Create a requests session with pooled keep-alive connections.
+    
+    Requests that fail with 502, 503 or 504 are retried twice with backoff
+    before the last response is returned. Compressed responses are accepted,
+    including Brotli when a decoder is installed.
+    
+    Args:
+        pool_connections (int): Number of per-host connection pools to cache
+        pool_maxsize (int): Maximum connections kept open per host
+        
+    Returns:
+        requests.Session: The configured session
+    """
+    retry = Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504],
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                          max_retries=retry)
+    
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = f"{config.APP_NAME.replace(' ', '')}/{config.APP_VERSION}"
+    # Advertises br only if urllib3 can decode it
+    session.headers.update(make_headers(accept_encoding=True))
+    return session
 
 class Logger:
     def __init__(self, max_history: int = 500):
         """Initialize the logger.
         
         Args:
-            max_history (int): Maximum number of log entries to keep in history
+            max_history (int): Maximum number of log entries to keep in
+                history; 0 or None keeps every entry
         """
         self.max_history = max_history
-        self.history: List[tuple] = []
+        maxlen = max_history or None
+        self.history: Deque[tuple] = deque(maxlen=maxlen)
+        # Messages indexed by level, holding exactly the entries in history.
+        # The deques share the message strings with history rather than
+        # copying them, and are bounded the same way
+        self.by_level: Dict[str, Deque[str]] = defaultdict(partial(deque, maxlen=maxlen))
+        # Guards history and by_level, which must be updated together
+        self._lock = threading.Lock()
         self.callbacks: List[Callable] = []
+        # Mirrors callbacks for O(1) membership checks; keyed on the callbacks
+        # themselves rather than id(), so equal bound methods match
+        self._callback_set: set = set()
+        # Last formatted timestamp, reused for entries within the same second
+        self._last_ts_sec = -1
+        self._last_ts_str = ''
 
     def log(self, message: str, level: str = "INFO") -> None:
         """Add a log entry.
@@ -22,26 +82,35 @@ class Logger:
             message (str): The log message
             level (str): Log level (INFO, WARNING, ERROR, SUCCESS, DEBUG)
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        sec = int(time.time())
+        if sec != self._last_ts_sec:
+            self._last_ts_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sec))
+            self._last_ts_sec = sec
+        timestamp = self._last_ts_str
         entry = (f"[{timestamp}] [{level}] {message}", level)
         
-        # Add to history
-        self.history.append(entry)
-        
-        # Trim history if needed
-        if len(self.history) > self.max_history:
-            self.history = self.history[-self.max_history:]
+        # Add to history; the deque drops the oldest entry once full, so
+        # drop it from its level index too
+        with self._lock:
+            if self.history and len(self.history) == self.history.maxlen:
+                self.by_level[self.history[0][1]].popleft()
+            self.history.append(entry)
+            self.by_level[level].append(entry[0])
         
-        # Notify callbacks
-        for callback in self.callbacks:
+        # Notify callbacks; skipped entirely while nobody is listening
+        callbacks = self.callbacks
+        if callbacks:
             try:
-                callback(entry)
+                for callback in callbacks:
+                    callback(entry)
             except Exception as e:
                 print(f"Error in log callback: {str(e)}")
 
     def clear(self) -> None:
         """Clear all log history."""
-        self.history = []
+        with self._lock:
+            self.history.clear()
+            self.by_level.clear()
 
     def get_logs(self, level: Optional[str] = None) -> List[str]:
         """Get filtered log entries.
@@ -52,9 +121,10 @@ class Logger:
         Returns:
             List[str]: List of filtered log messages
         """
-        if level and level != "ALL":
-            return [msg for msg, lvl in self.history if lvl == level]
-        return [msg for msg, _ in self.history]
+        with self._lock:
+            if level and level != "ALL":
+                return list(self.by_level.get(level, ()))
+            return [msg for msg, _ in self.history]
 
     def save_to_file(self, filepath: str) -> None:
         """Save logs to a file.
@@ -62,20 +132,47 @@ class Logger:
         Args:
             filepath (str): Path to save the log file
         """
+        self._write_messages(filepath, self.get_logs())
+
+    def save_to_file_async(self, filepath: str) -> threading.Thread:
+        """Save logs to a file on a background thread.
+        
+        The history is copied before the thread starts, so logging can carry
+        on while the file is written.
+        
+        Args:
+            filepath (str): Path to save the log file
+            
+        Returns:
+            threading.Thread: The thread writing the file
+        """
+        messages = self.get_logs()
+        thread = threading.Thread(target=self._write_messages, args=(filepath, messages),
+                                  daemon=True)
+        thread.start()
+        return thread
+
+    def _write_messages(self, filepath: str, messages: List[str]) -> None:
+        """Write log messages to a file, one per line."""
         try:
             with open(filepath, 'w', encoding='utf-8') as f:
-                for message, _ in self.history:
-                    f.write(message + "\n")
+                # One write for the whole file instead of one per entry
+                if messages:
+                    f.write("\n".join(messages) + "\n")
         except Exception as e:
             self.log(f"Error saving logs to file: {str(e)}", level="ERROR")
 
     def add_callback(self, callback: Callable) -> None:
         """Add a callback function to be called for each new log entry.
         
+        Callbacks are expected not to raise. An exception is printed and stops
+        the entry from reaching the callbacks registered after it.
+        
         Args:
             callback (callable): Function to call with each new log entry
         """
-        if callable(callback) and callback not in self.callbacks:
+        if callable(callback) and callback not in self._callback_set:
+            self._callback_set.add(callback)
             self.callbacks.append(callback)
 
     def remove_callback(self, callback: Callable) -> None:
@@ -84,10 +181,48 @@ class Logger:
         Args:
             callback (callable): Function to remove from callbacks
         """
-        if callback in self.callbacks:
+        if callback in self._callback_set:
+            self._callback_set.discard(callback)
             self.callbacks.remove(callback)
 
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        """Initialize the token bucket rate limiter.
+        
+        Args:
+            rate (float): Tokens added to the bucket per second
+            capacity (float): Maximum number of tokens the bucket can hold
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, tokens: float = 1) -> None:
+        """Take tokens from the bucket, sleeping until they are available.
+        
+        Callers reserve their tokens up front, so concurrent callers are
+        paced one after another rather than all waking at once.
+        
+        Args:
+            tokens (float): Number of tokens to take
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity,
+                              self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            self.tokens -= tokens
+            wait_time = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait_time:
+            time.sleep(wait_time)
+
 class ConfigManager:
+    # Files at least this large are parsed straight from a memory map
+    _MMAP_MIN_SIZE = 1024 * 1024
+
     def __init__(self, config_file: str, logger: Optional[Logger] = None):
         """Initialize the configuration manager.
         
@@ -98,14 +233,23 @@ class ConfigManager:
         self.config_file = config_file
         self.logger = logger
         self.config: Dict = {}
+        # Set by set/delete; saving is skipped while the file is up to date
+        self._dirty = False
         self.load_config()
 
     def load_config(self) -> None:
         """Load configuration from file."""
         try:
             if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    self.config = json.load(f)
+                with open(self.config_file, 'rb') as f:
+                    if orjson is not None and os.fstat(f.fileno()).st_size >= self._MMAP_MIN_SIZE:
+                        # Parse from the page cache without copying into a bytes object
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                                memoryview(mm) as view:
+                            self.config = orjson.loads(view)
+                    else:
+                        data = f.read()
+                        self.config = orjson.loads(data) if orjson is not None else json.loads(data)
                 if self.logger:
                     self.logger.log("Configuration loaded successfully", level="INFO")
         except Exception as e:
@@ -114,13 +258,39 @@ class ConfigManager:
             self.config = {}
 
     def save_config(self) -> None:
-        """Save configuration to file."""
+        """Save configuration to file if it changed since the last load or save."""
+        if not self._dirty:
+            return
+        self._dirty = False
+        self._write_config(self.config)
+
+    def _write_config(self, data: Dict) -> None:
+        """Serialize configuration data to the config file atomically."""
+        temp_path = None
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=4)
+            if orjson is not None:
+                payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+            else:
+                payload = json.dumps(data, indent=4).encode('utf-8')
+            
+            # Write next to the target and swap it in, so a crash mid-write
+            # never leaves a truncated settings file
+            directory = os.path.dirname(os.path.abspath(self.config_file))
+            with tempfile.NamedTemporaryFile('wb', dir=directory, suffix='.tmp',
+                                             delete=False) as f:
+                temp_path = f.name
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.config_file)
+            
             if self.logger:
                 self.logger.log("Configuration saved successfully", level="INFO")
         except Exception as e:
+            # Keep the changes pending so the next save retries them
+            self._dirty = True
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
             if self.logger:
                 self.logger.log(f"Error saving configuration: {str(e)}", level="ERROR")
 
@@ -143,7 +313,10 @@ class ConfigManager:
             key (str): Configuration key
             value: Value to set
         """
+        if key in self.config and self.config[key] == value:
+            return
         self.config[key] = value
+        self._dirty = True
 
     def delete(self, key: str) -> None:
         """Delete a configuration value.
@@ -153,13 +326,28 @@ class ConfigManager:
         """
         if key in self.config:
             del self.config[key]
+            self._dirty = True
 
 class HTMLFormatter:
-    def __init__(self):
-        """Initialize the HTML formatter."""
-        self.heading_pattern = re.compile(r'^#{1,6}\s+(.+)$', re.MULTILINE)
-        self.list_pattern = re.compile(r'^\s*[-*+]\s+(.+)$', re.MULTILINE)
-        self.paragraph_pattern = re.compile(r'([^\n]+?)(?:\n\n|$)')
+    # Patterns shared by every instance, compiled once at import
+    _HEADING_RE = re.compile(r'^#{1,6}\s+(.+)$', re.MULTILINE)
+    _LIST_RE = re.compile(r'^\s*[-*+]\s+(.+)$', re.MULTILINE)
+    _WS_RE = re.compile(r'\s+')
+    _HEADING_ADJ_RE = re.compile(r'</h[1-6]>\s*<h[1-6]>')
+    _P_ADJ_RE = re.compile(r'</p>\s*<p>')
+    _UL_ADJ_RE = re.compile(r'</ul>\s*<')
+    _DOCUMENT_RE = re.compile(r'\s*(<!doctype|<html)', re.IGNORECASE)
+    # Removes <script>, <style> and <iframe> elements with their contents,
+    # the same set the earlier regex passes stripped; all other markup,
+    # including <object>/<embed> and the page structure, is kept
+    _CLEANER = Cleaner(scripts=True, javascript=False, comments=False, style=True,
+                       inline_style=False, links=False, meta=False, page_structure=False,
+                       processing_instructions=False, embedded=False, frames=False,
+                       forms=False, annoying_tags=False, remove_unknown_tags=False,
+                       safe_attrs_only=False, kill_tags=('iframe',))
+    # Number of recent results kept per operation; the output depends only on
+    # the input text, so repeat previews of an article skip the work
+    _CACHE_SIZE = 64
 
     def format_content(self, content: str) -> str:
         """Format content into structured HTML.
@@ -170,29 +358,68 @@ class HTMLFormatter:
         Returns:
             str: Formatted HTML content
         """
+        return self._format_content(content)
+
+    @classmethod
+    @lru_cache(maxsize=_CACHE_SIZE)
+    def _format_content(cls, content: str) -> str:
+        """Cached implementation of format_content."""
         try:
-            # Clean up whitespace
-            content = content.strip()
-            content = re.sub(r'\n{3,}', '\n\n', content)
-            
-            # Convert headings
-            content = self.heading_pattern.sub(lambda m: f'<h2>{m.group(1)}</h2>', content)
-            
-            # Convert lists
-            content = self.list_pattern.sub(lambda m: f'<li>{m.group(1)}</li>', content)
-            content = re.sub(r'(<li>.*?</li>\n*)+', r'<ul>\n\g<0></ul>', content, flags=re.DOTALL)
+            # Single pass over the lines, writing finished blocks to a buffer
+            buffer = io.StringIO()
+            paragraph: List[str] = []
+            in_list = False
             
-            # Convert paragraphs
-            content = self.paragraph_pattern.sub(lambda m: f'<p>{m.group(1)}</p>\n<p></p>\n', content)
+            for line in content.strip().split('\n'):
+                item = cls._LIST_RE.match(line)
+                if item:
+                    # Consecutive items share one list, even across blank lines
+                    cls._write_paragraph(buffer, paragraph)
+                    if not in_list:
+                        cls._write_block(buffer, '<ul>')
+                        in_list = True
+                    buffer.write(f'\n<li>{item.group(1)}</li>')
+                    continue
+                
+                if not line.strip():
+                    # A blank line ends the current paragraph
+                    cls._write_paragraph(buffer, paragraph)
+                    continue
+                
+                if in_list:
+                    buffer.write('\n</ul>')
+                    in_list = False
+                
+                heading = cls._HEADING_RE.match(line)
+                if heading:
+                    cls._write_paragraph(buffer, paragraph)
+                    cls._write_block(buffer, f'<h2>{heading.group(1)}</h2>')
+                else:
+                    paragraph.append(line)
             
-            # Clean up empty paragraphs
-            content = re.sub(r'(<p></p>\s*){2,}', '<p></p>\n', content)
+            cls._write_paragraph(buffer, paragraph)
+            if in_list:
+                buffer.write('\n</ul>')
             
-            return content.strip()
+            return buffer.getvalue()
             
         except Exception as e:
             return f'<p>Error formatting content: {str(e)}</p>'
 
+    @staticmethod
+    def _write_block(buffer: io.StringIO, block: str) -> None:
+        """Write a block, separated from the previous one by an empty paragraph."""
+        if buffer.tell():
+            buffer.write('\n<p></p>\n')
+        buffer.write(block)
+
+    @classmethod
+    def _write_paragraph(cls, buffer: io.StringIO, lines: List[str]) -> None:
+        """Write pending paragraph lines as one paragraph block and reset them."""
+        if lines:
+            cls._write_block(buffer, '<p>' + '\n'.join(lines).strip() + '</p>')
+            lines.clear()
+
     def sanitize_html(self, html: str) -> str:
         """Sanitize HTML content.
         
@@ -202,19 +429,36 @@ class HTMLFormatter:
         Returns:
             str: Sanitized HTML content
         """
+        return self._sanitize_html(html)
+
+    @classmethod
+    @lru_cache(maxsize=_CACHE_SIZE)
+    def _sanitize_html(cls, html: str) -> str:
+        """Cached implementation of sanitize_html."""
         try:
-            # Remove potentially harmful tags
-            html = re.sub(r'<script.*?>.*?</script>', '', html, flags=re.DOTALL | re.IGNORECASE)
-            html = re.sub(r'<style.*?>.*?</style>', '', html, flags=re.DOTALL | re.IGNORECASE)
-            html = re.sub(r'<iframe.*?>.*?</iframe>', '', html, flags=re.DOTALL | re.IGNORECASE)
+            # Remove potentially harmful tags in a single parse
+            document_match = cls._DOCUMENT_RE.match(html)
+            if document_match:
+                # Full documents keep their <head>, <title> and any doctype;
+                # libxml2 reports a default doctype when there is none
+                document = lxml.html.document_fromstring(html)
+                cls._CLEANER(document)
+                doctype = (document.getroottree().docinfo.doctype
+                           if document_match.group(1).lower() == '<!doctype' else '')
+                html = doctype + lxml.html.tostring(document, encoding='unicode')
+            else:
+                fragment = lxml.html.fragment_fromstring(html, create_parent='div')
+                cls._CLEANER(fragment)
+                # Serialize the wrapper's contents, without the <div> and </div>
+                html = lxml.html.tostring(fragment, encoding='unicode')[5:-6]
             
             # Clean up whitespace
-            html = re.sub(r'\s+', ' ', html)
+            html = cls._WS_RE.sub(' ', html)
             
             # Ensure proper spacing between elements
-            html = re.sub(r'</h[1-6]>\s*<h[1-6]>', lambda m: m.group(0) + '\n<p></p>\n', html)
-            html = re.sub(r'</p>\s*<p>', '</p>\n<p></p>\n<p>', html)
-            html = re.sub(r'</ul>\s*<', '</ul>\n<p></p>\n<', html)
+            html = cls._HEADING_ADJ_RE.sub(r'\g<0>\n<p></p>\n', html)
+            html = cls._P_ADJ_RE.sub('</p>\n<p></p>\n<p>', html)
+            html = cls._UL_ADJ_RE.sub('</ul>\n<p></p>\n<', html)
             
             return html.strip()
             
@@ -230,14 +474,18 @@ class HTMLFormatter:
         Returns:
             str: Plain text content
         """
+        return self._extract_text(html)
+
+    @staticmethod
+    @lru_cache(maxsize=_CACHE_SIZE)
+    def _extract_text(html: str) -> str:
+        """Cached implementation of extract_text."""
         try:
-            # Remove HTML tags
-            text = re.sub(r'<[^>]+>', '', html)
-            
-            # Clean up whitespace
-            text = re.sub(r'\s+', ' ', text)
+            # Take the text content, with entities decoded
+            text = lxml.html.fragment_fromstring(html, create_parent='div').text_content()
             
-            return text.strip()
+            # Collapse and trim whitespace in one pass
+            return ' '.join(text.split())
             
         except Exception as e:
             return f"Error extracting text: {str(e)}"